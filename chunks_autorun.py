@@ -1,6 +1,8 @@
 import sys, os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
  
+from concurrent.futures import ThreadPoolExecutor
+ 
 from src.data_processor.fixed_size_webpage_chunk import run as fixed_webpage
 from src.data_processor.recursive_webpage_chunk import run as recursive_webpage
 from src.data_processor.fixed_size_youtube_chunk import run as fixed_youtube
@@ -32,19 +34,36 @@ VIDEOS = [
     # "283EGmUxRN0",
 ]
  
+MAX_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+
+# Every runner replaces its source's stored chunks, so the first run against a
+# collection built with the old random chunk ids also removes those copies.
+ 
+ 
+def run_all(runner, sources, max_workers: int = MAX_WORKERS):
+    """Ingest every source concurrently; a failing source doesn't stop the rest."""
+    def _safe(source):
+        try:
+            return runner(source)
+        except Exception as e:
+            print(f"  ✗ {source} failed: {e}")
+            return []
+ 
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_safe, sources))
+ 
+ 
 if __name__ == "__main__":
     # ── Webpages ──────────────────────────────────────────────────────
     print("=" * 60)
     print("  POPULATING WEBPAGE CHUNKS")
     print("=" * 60)
     
-    # for url in URLS:
-    #     recursive_webpage(url)
-    #     fixed_webpage(url)
+    # run_all(recursive_webpage, URLS)
+    # run_all(fixed_webpage, URLS)
     
-    for video_url in VIDEOS:
-        # recursive_youtube(video_url)
-        fixed_youtube(video_url)
+    # run_all(recursive_youtube, VIDEOS)
+    run_all(fixed_youtube, VIDEOS)
     # for url in URLS:
     #     print(f"\n{'─'*60}")
     #     print(f"[FIXED-SIZE] {url}")
@@ -1,21 +1,43 @@
+import asyncio
 import os
-import json
+import orjson
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from src.data_processor.youtube_transcript_chunk import run as run_semantic_youtube_chunk
-from src.data_processor.webpage_chunk import run as run_semantic_webpage_chunk
-from src.data_processor.agentic_youtube_transcript_chunking import run as run_youtube_chunk
-from src.data_processor.agentic_webpage_chunking import run as run_webpage_chunk
+from importlib import import_module
+from src.config.config import config
 from src.utils.utils import get_video_id, is_youtube_url, set_active_store_type
-from src.data_processor.recursive_webpage_chunk import run as run_recursive_webpage_chunk
-from src.data_processor.recursive_youtube_chunk import run as run_recursive_youtube_chunk
-from src.data_processor.fixed_size_webpage_chunk import run as run_fixed_size_webpage_chunk
-from src.data_processor.fixed_size_youtube_chunk import run as run_fixed_size_youtube_chunk
 from src.graph.visualize_graph import visualize_langgraph_app
+from src.utils.openai_client import close_http_clients
 
-app = FastAPI()
+
+def _warm_up() -> None:
+    """Load everything the first /chat would otherwise pay for."""
+    from src.agents.retrieval import _cross_encoder
+    from src.vector_store.vector_store import get_embeddings
+
+    get_graph()
+    get_embeddings()
+    if config.RERANK_BACKEND == "cross_encoder":
+        _cross_encoder.load()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the graph (agents, embedding model, reranker, Chroma client) once the
+    # server boots instead of on the first /chat; importing main stays cheap. If
+    # it fails here, each piece still loads lazily on the first request.
+    try:
+        await asyncio.to_thread(_warm_up)
+    except Exception as e:
+        print(f"[startup] Graph warm-up failed: {e}")
+    yield
+    await close_http_clients()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 videos = [
         "https://www.youtube.com/watch?v=KywRgZpLb5w", 
@@ -51,6 +73,23 @@ def get_graph():
 # graph=get_graph()
 # visualize_langgraph_app(graph)
 
+# Chunking runners are imported on first use so startup doesn't pay for every
+# strategy's splitters and loaders.
+_CHUNK_RUNNERS = {
+    ("youtube", "agentic"):    "src.data_processor.agentic_youtube_transcript_chunking",
+    ("youtube", "semantic"):   "src.data_processor.youtube_transcript_chunk",
+    ("youtube", "fixed_size"): "src.data_processor.fixed_size_youtube_chunk",
+    ("youtube", "recursive"):  "src.data_processor.recursive_youtube_chunk",
+    ("webpage", "agentic"):    "src.data_processor.agentic_webpage_chunking",
+    ("webpage", "semantic"):   "src.data_processor.webpage_chunk",
+    ("webpage", "fixed_size"): "src.data_processor.fixed_size_webpage_chunk",
+    ("webpage", "recursive"):  "src.data_processor.recursive_webpage_chunk",
+}
+
+def _get_chunk_runner(source: str, chunk_type: str):
+    module = _CHUNK_RUNNERS.get((source, chunk_type))
+    return import_module(module).run if module else None
+
 class ChatRequest(BaseModel):
     question: str
     conversation_history: str = "[]"
@@ -69,25 +108,17 @@ async def ingest_information(request: InjestRequest):
         set_active_store_type(request.chunk_type)
         url = request.url
         chunk_docs = []
+        # Fetching, LLM chunking and embedding all block, so the runner (and its
+        # first-use import) goes to a worker thread and the event loop keeps
+        # serving /chat while a source is ingested.
         if is_youtube_url(url):
-            video_id = get_video_id(url)
-            if request.chunk_type == "agentic":
-                chunk_docs = run_youtube_chunk(video_id)
-            elif request.chunk_type == "semantic":
-                chunk_docs = run_semantic_youtube_chunk(video_id)
-            elif request.chunk_type == "fixed_size":
-                chunk_docs = run_fixed_size_youtube_chunk(video_id)
-            elif request.chunk_type == "recursive":
-                chunk_docs = run_recursive_youtube_chunk(video_id)
-        else:   
-            if request.chunk_type == "agentic":
-                chunk_docs = run_webpage_chunk(url)
-            elif request.chunk_type == "semantic":
-                chunk_docs = run_semantic_webpage_chunk(url)
-            elif request.chunk_type == "fixed_size":
-                chunk_docs = run_fixed_size_webpage_chunk(url)
-            elif request.chunk_type == "recursive":
-                chunk_docs = run_recursive_webpage_chunk(url)
+            run = await asyncio.to_thread(_get_chunk_runner, "youtube", request.chunk_type)
+            if run:
+                chunk_docs = await asyncio.to_thread(run, get_video_id(url))
+        else:
+            run = await asyncio.to_thread(_get_chunk_runner, "webpage", request.chunk_type)
+            if run:
+                chunk_docs = await asyncio.to_thread(run, url)
         
         return {
             "docs": chunk_docs,
@@ -98,35 +129,83 @@ async def ingest_information(request: InjestRequest):
         return {"error": str(e), "success": False}
 
 
+def _chat_result(request: ChatRequest, history: list, state: dict) -> dict:
+    answer = state.get("final_answer", "")
+    needs_clarification = bool(state.get("needs_clarification", False))
+
+    if not needs_clarification:
+        history.append({"role": "student", "content": request.question})
+        history.append({"role": "tutor", "content": answer})
+
+    return {
+        "answer": answer,
+        "conversation_history": orjson.dumps(history).decode(),
+        "success": True
+    }
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
 @app.post("/chat")
 async def chat(request: ChatRequest):
     if not os.getenv("OPENAI_API_KEY"):
         return {"error": "OPENAI_API_KEY not set"}
     
     try:
-        history = json.loads(request.conversation_history)
+        history = orjson.loads(request.conversation_history)
         graph = get_graph()
-        state = graph.invoke({
+        state = await graph.ainvoke({
             "original_question": request.question,
             "conversation_history": history,
             "chunk_type": request.chunk_type,
         })
-        
-        answer = state.get("final_answer", "")
-        needs_clarification = bool(state.get("needs_clarification", False))
-        
-        if not needs_clarification:
-            history.append({"role": "student", "content": request.question})
-            history.append({"role": "tutor", "content": answer})
-        
-        return {
-            "answer": answer,
-            "conversation_history": json.dumps(history),
-            "success": True
-        }
+        return _chat_result(request, history, state)
     except Exception as e:
         return {"error": str(e), "success": False}
 
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Same as /chat, but streams the tutor's tokens as server-sent events.
+
+    Emits `token` events while the tutor node generates, then one `done`
+    event carrying the same payload /chat returns.
+    """
+    if not os.getenv("OPENAI_API_KEY"):
+        return {"error": "OPENAI_API_KEY not set"}
+
+    async def events():
+        try:
+            history = orjson.loads(request.conversation_history)
+            graph = get_graph()
+            state: dict = {}
+            async for mode, chunk in graph.astream({
+                "original_question": request.question,
+                "conversation_history": history,
+                "chunk_type": request.chunk_type,
+            }, stream_mode=["messages", "values"]):
+                if mode == "values":
+                    state = chunk
+                    continue
+                message, meta = chunk
+                if meta.get("langgraph_node") == "tutor" and message.content:
+                    yield _sse("token", {"token": message.content})
+            yield _sse("done", _chat_result(request, history, state))
+        except Exception as e:
+            yield _sse("done", {"error": str(e), "success": False})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 7860))
-    uvicorn.run("main:app", host="0.0.0.0", port=port)
\ No newline at end of file
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.environ.get("WEB_CONCURRENCY", 2)),
+        reload=os.environ.get("RELOAD", "").lower() in ("1", "true", "yes"),
+    )
\ No newline at end of file
@@ -5,8 +5,8 @@ from src.prompts.clarification import CLARIFICATION_SYSTEM
 
 
 class ClarificationAgent:
-    def __init__(self):
-        self.llm = openai_client
+    def __init__(self, llm=None):
+        self.llm = llm or openai_client
 
     def __call__(self, state: dict) -> dict:
         original_q = (state.get("original_question") or "").strip()
@@ -5,8 +5,8 @@ from src.prompts.evaluation import EVALUATION_SYSTEM
 
 
 class EvaluationAgent:
-    def __init__(self):
-        self.llm = openai_client
+    def __init__(self, llm=None):
+        self.llm = llm or openai_client
 
     def __call__(self, state: dict) -> dict:
         q = (state.get("original_question") or "").strip()
@@ -2,14 +2,14 @@ from typing import Any, Dict, List
 
 from langchain_core.messages import SystemMessage, HumanMessage
 
-from src.utils.openai_client import openai_client
+from src.utils.openai_client import cached_openai_client
 from src.utils.utils import safe_json_loads
 from src.prompts.multi_queries import MULTI_QUERY_SYSTEM
 
 
 class MultiQueryAgent:
-    def __init__(self, max_queries: int = 5):
-        self.llm = openai_client
+    def __init__(self, max_queries: int = 5, llm=None):
+        self.llm = llm or cached_openai_client
         self.max_queries = max_queries
 
     def __call__(self, state: dict) -> dict:
@@ -10,8 +10,8 @@ class PersonalizationAgent:
     No file storage — assessed fresh every turn from the message + history.
     """
 
-    def __init__(self):
-        self.llm = openai_client
+    def __init__(self, llm=None):
+        self.llm = llm or openai_client
 
     def __call__(self, state: dict) -> dict:
         q = (state.get("original_question") or "").strip()
@@ -1,5 +1,5 @@
 from langchain_core.messages import SystemMessage, HumanMessage
-from src.utils.openai_client import openai_client
+from src.utils.openai_client import cached_openai_client
 from src.utils.utils import safe_json_loads
 from src.prompts.question_understanding import QUESTION_UNDERSTANDING_SYSTEM
 
@@ -11,8 +11,8 @@ _ALLOWED_STYLES = {
 
 
 class QuestionUnderstandingAgent:
-    def __init__(self):
-        self.llm = openai_client
+    def __init__(self, llm=None):
+        self.llm = llm or cached_openai_client
 
     def __call__(self, state: dict) -> dict:
         q = (state.get("original_question") or state.get("user_input") or "").strip()
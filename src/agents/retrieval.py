@@ -1,12 +1,20 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from operator import itemgetter
 from typing import Any, Dict, List, Optional
-import json
+import heapq
+import threading
+import orjson
+import torch
 
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.documents import Document
+from sentence_transformers import CrossEncoder
 
-from src.utils.openai_client import openai_client
-from src.vector_store.vector_store import VectorStoreManager
+from src.config.config import config
+from src.utils.openai_client import cached_openai_client
+from src.utils.utils import strip_code_fences
+from src.vector_store.vector_store import VectorStoreManager, get_vector_store_manager
 
 _INTENT_TO_CONTENT_TYPE = {
     "concept": "concept", "procedure": "procedure", "example": "example",
@@ -14,11 +22,61 @@ _INTENT_TO_CONTENT_TYPE = {
 }
 
 
+class CrossEncoderReranker:
+    """Scores (question, doc) pairs locally in one batched cross-encoder forward pass."""
+
+    def __init__(self, model_name: str = config.RERANK_MODEL, batch_size: int = 32):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model: Optional[CrossEncoder] = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> CrossEncoder:
+        return self.load()
+
+    def load(self) -> CrossEncoder:
+        """Load the cross-encoder once, even when several threads ask at the same time."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    torch.set_num_threads(config.INFERENCE_THREADS)
+                    # The hub config may leave ms-marco heads on raw logits; pin the
+                    # sigmoid so rerank thresholds always see scores in [0, 1].
+                    self._model = CrossEncoder(self.model_name, activation_fn=torch.nn.Sigmoid())
+        return self._model
+
+    def score(self, question: str, texts: List[str]) -> List[float]:
+        """Sigmoid relevance in [0, 1] for each text, in order."""
+        pairs = [(question, t) for t in texts]
+        scores = self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        return [float(s) for s in scores]
+
+
+# Loaded on first rerank and shared by every RetrievalAgent
+_cross_encoder = CrossEncoderReranker()
+
+
+def _to_results(docs: List[Document]) -> List[Dict[str, Any]]:
+    """Convert LangChain documents to result dicts with stripped content, dropping empty ones."""
+    return [
+        {
+            "id": getattr(d, "id", None),
+            "content": content,
+            "metadata": (getattr(d, "metadata", {}) or {}),
+        }
+        for d in docs
+        if (content := (getattr(d, "page_content", "") or "").strip())
+    ]
+
+
 class RetrievalAgent:
-    def __init__(self, type: str = "agentic"):
+    def __init__(self, type: str = "agentic", client=None,
+                 store_manager: Optional[VectorStoreManager] = None):
         self._type = type
-        self.vector_store = VectorStoreManager(type=type).vector_store
-        self.client = openai_client
+        self.store_manager = store_manager or get_vector_store_manager(type)
+        self.vector_store = self.store_manager.vector_store
+        self.client = client or cached_openai_client
 
     def retrieve(self, query: str, k: int = 8, metadata_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         try:
@@ -33,14 +91,7 @@ class RetrievalAgent:
         filter_msg = f" (filter={metadata_filter})" if metadata_filter else ""
         print(f"[RetrievalAgent] Retrieved {len(docs)} raw docs.{filter_msg}")
 
-        return [
-            {
-                "content": (getattr(d, "page_content", "") or "").strip(),
-                "metadata": (getattr(d, "metadata", {}) or {}),
-            }
-            for d in docs
-            if (getattr(d, "page_content", "") or "").strip()
-        ]
+        return _to_results(docs)
 
     def retrieve_mmr(self, query: str, k: int = 8, fetch_k: int = 20,
                      lambda_mult: float = 0.5,
@@ -57,30 +108,46 @@ class RetrievalAgent:
  
         print(f"[RetrievalAgent] MMR retrieved {len(docs)} docs (lambda={lambda_mult}).")
  
-        return [
-            {
-                "content": (getattr(d, "page_content", "") or "").strip(),
-                "metadata": (getattr(d, "metadata", {}) or {}),
-            }
-            for d in docs
-            if (getattr(d, "page_content", "") or "").strip()
-        ]
+        return _to_results(docs)
+
+    def retrieve_many(self, queries: List[str], k: int = 8, mmr: bool = False) -> List[List[Dict[str, Any]]]:
+        """Retrieve for several independent queries at once; one result list per query."""
+        if not queries:
+            return []
+        if not mmr:
+            try:
+                docs_per_query = self.store_manager.batch_search(queries, k=k)
+            except Exception as e:
+                print(f"[RetrievalAgent] Batch search error: {e}")
+                return [[] for _ in queries]
+            return [_to_results(docs) for docs in docs_per_query]
+        # MMR re-ranks per query client-side, so overlap the per-query round trips.
+        with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+            return list(pool.map(lambda q: self.retrieve_mmr(q, k=k), queries))
 
     def retrieve_multi(self, queries: List[str], k_per_query: int = 5,
                        metadata_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
-        """Run retrieval per query, deduplicate, fuse with Reciprocal Rank Fusion."""
+        """Run all queries as one batched search, deduplicate, fuse with Reciprocal Rank Fusion."""
         if not queries:
             return []
 
         seen_content: Dict[str, Dict[str, Any]] = {}
         rrf_k = 60
 
-        for qi, query in enumerate(queries):
-            docs = self.retrieve(query, k=k_per_query, metadata_filter=metadata_filter)
+        try:
+            docs_per_query = self.store_manager.batch_search(queries, k=k_per_query, metadata_filter=metadata_filter)
+        except Exception as e:
+            print(f"[RetrievalAgent] Batch search error: {e}")
+            return []
+
+        results_per_query = [_to_results(docs) for docs in docs_per_query]
+
+        for qi, docs in enumerate(results_per_query):
             for rank, doc in enumerate(docs):
-                content = doc.get("content", "").strip()
-                if not content:
-                    continue
+                # _to_results already stripped content and dropped empty docs.
+                content = doc["content"]
+                # Keyed on content, not the Chroma id: collections not yet migrated
+                # off random ids hold the same chunk under two ids.
                 content_key = content[:200]
                 rrf_score = 1.0 / (rrf_k + rank + 1)
                 if content_key in seen_content:
@@ -90,15 +157,61 @@ class RetrievalAgent:
                     doc_copy["rrf_score"] = rrf_score
                     seen_content[content_key] = doc_copy
 
-        fused = sorted(seen_content.values(), key=lambda x: x["rrf_score"], reverse=True)
+        fused = sorted(seen_content.values(), key=itemgetter("rrf_score"), reverse=True)
         print(f"[RetrievalAgent] Multi-query fusion: {len(fused)} unique docs from {len(queries)} queries")
         return fused
 
-    def rerank(self, question: str, docs: List[Dict[str, Any]], threshold: float = 0.35) -> List[Dict[str, Any]]:
-        """LLM scores each doc 0-1. Keeps docs above threshold, sorted by score."""
+    def rerank(self, question: str, docs: List[Dict[str, Any]], threshold: Optional[float] = None,
+               top_n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Scores each doc 0-1 (cross-encoder, or LLM fallback). Keeps docs at or above the
+        scorer's threshold, sorted by score (top_n at most). If none clears it, the best
+        RERANK_FALLBACK_K docs are kept so the tutor never answers without context."""
         if not docs:
             return []
 
+        # Truncate once; both scorers (and the fallback) reuse the same snippets
+        snippets = [d.get("content", "")[:config.RERANK_MAX_CHARS] for d in docs]
+
+        scores = None
+        if config.RERANK_BACKEND == "cross_encoder":
+            try:
+                scores = _cross_encoder.score(question, snippets)
+                default_threshold = config.RERANK_THRESHOLD_CROSS_ENCODER
+            except Exception as e:
+                print(f"[RetrievalAgent] Cross-encoder error: {e} — falling back to LLM rerank.")
+        if scores is None:
+            scores = self._llm_scores(question, snippets)
+            if scores is None:
+                return docs
+            default_threshold = config.RERANK_THRESHOLD_LLM
+        if threshold is None:
+            threshold = default_threshold
+
+        # (score, -index, doc): -index keeps earlier docs ahead on ties.
+        ranked: List[tuple] = []
+        for i, d in enumerate(docs):
+            try:
+                score = float(scores[i])
+            except (IndexError, ValueError, TypeError):
+                score = 0.0
+            d["relevance_score"] = score
+            ranked.append((score, -i, d))
+
+        relevant = [r for r in ranked if r[0] >= threshold]
+        if relevant:
+            keep = top_n or len(relevant)
+        else:
+            relevant = ranked
+            keep = min(top_n or config.RERANK_FALLBACK_K, config.RERANK_FALLBACK_K)
+            print(f"[RetrievalAgent] No docs above threshold={threshold}; keeping the top {keep} by score.")
+        # heapq.nlargest selects top_n in O(M log k) instead of sorting every candidate.
+        selected = [d for _, _, d in heapq.nlargest(keep, relevant, key=itemgetter(0, 1))]
+
+        print(f"[RetrievalAgent] Reranked: {len(selected)}/{len(docs)} docs kept (threshold={threshold})")
+        return selected
+
+    def _llm_scores(self, question: str, snippets: List[str]) -> Optional[List[Any]]:
+        """Ask the LLM for one relevance float per snippet. Returns None if the call fails."""
         system = (
             "Score each document's relevance to the student's question from 0.0 to 1.0.\n"
             "1.0 = directly teaches the concept being asked about.\n"
@@ -108,32 +221,18 @@ class RetrievalAgent:
             "No explanation. No markdown. JSON array only."
         )
 
-        parts = [f"Doc {i+1}:\n{d.get('content', '')[:400]}" for i, d in enumerate(docs)]
+        parts = [f"Doc {i+1}:\n{snippet}" for i, snippet in enumerate(snippets)]
         user = f"Question: {question}\n\n" + "\n---\n".join(parts)
 
         try:
             resp = self.client.invoke([SystemMessage(content=system), HumanMessage(content=user)])
-            raw = resp.content.strip().replace("```json", "").replace("```", "").strip()
-            scores = json.loads(raw)
-
-            if not isinstance(scores, list):
-                return docs
-
-            for i, d in enumerate(docs):
-                try:
-                    d["relevance_score"] = float(scores[i])
-                except (IndexError, ValueError, TypeError):
-                    d["relevance_score"] = 0.0
-
-            relevant = [d for d in docs if d.get("relevance_score", 0.0) >= threshold]
-            relevant.sort(key=lambda x: x.get("relevance_score", 0.0), reverse=True)
-
-            print(f"[RetrievalAgent] Reranked: {len(relevant)}/{len(docs)} docs above threshold={threshold}")
-            return relevant if relevant else []
-
+            raw = strip_code_fences(resp.content)
+            scores = orjson.loads(raw)
         except Exception as e:
             print(f"[RetrievalAgent] Rerank error: {e} — returning all docs unfiltered.")
-            return docs
+            return None
+
+        return scores if isinstance(scores, list) else None
 
 
 @dataclass
@@ -176,11 +275,11 @@ class RetrievalNode:
                 results = self.retrieval_agent.retrieve(question, k=self.k, metadata_filter=None)
 
         if self.rerank and results:
-            results = self.retrieval_agent.rerank(question, results)
+            results = self.retrieval_agent.rerank(question, results, top_n=self.k)
 
         lc_docs: List[Document] = []
         for r in results:
-            content = (r.get("content") or "").strip()
+            content = r.get("content")
             if not content:
                 continue
             meta = dict(r.get("metadata", {}) or {})
@@ -188,7 +287,7 @@ class RetrievalNode:
                 meta["relevance_score"] = r["relevance_score"]
             if "rrf_score" in r:
                 meta["rrf_score"] = r["rrf_score"]
-            lc_docs.append(Document(page_content=content, metadata=meta))
+            lc_docs.append(Document(page_content=content, metadata=meta, id=r.get("id")))
 
         print(f"[RetrievalNode] Passing {len(lc_docs)} docs to TutorAgent.")
         return {"retrieved_docs": lc_docs}
\ No newline at end of file
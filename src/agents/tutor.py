@@ -4,8 +4,8 @@ from src.prompts.tutor import TUTOR_SYSTEM
 
 
 class TutorAgent:
-    def __init__(self):
-        self.llm = openai_client
+    def __init__(self, llm=None):
+        self.llm = llm or openai_client
 
     def __call__(self, state: dict) -> dict:
         q = (state.get("original_question") or "").strip()
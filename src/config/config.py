@@ -1,40 +1,106 @@
 import os
+import platform
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
-@dataclass
+
+def _default_onnx_file() -> str:
+    """The all-MiniLM-L6-v2 ONNX export whose kernels this CPU runs natively."""
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "onnx/model_qint8_arm64.onnx"
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = next((line.split(":", 1)[1].split() for line in f if line.startswith("flags")), [])
+    except OSError:
+        flags = []
+    if "avx512_vnni" in flags:
+        return "onnx/model_qint8_avx512_vnni.onnx"
+    if "avx512f" in flags:
+        return "onnx/model_qint8_avx512.onnx"
+    if "avx2" in flags:
+        return "onnx/model_quint8_avx2.onnx"
+    # Unknown CPU: the fp32 export avoids slow generic int8 kernels
+    return "onnx/model.onnx"
+
+# Env is read once here at import; frozen + slots keeps the resolved values fixed
+@dataclass(frozen=True, slots=True)
 class Config:
     # OpenAI Configuration
-    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY")
+    OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL: str = "gpt-5.2"
+    # Connection cap per HTTP pool (one sync, one async) and ingestion batch concurrency
+    OPENAI_MAX_CONCURRENCY: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+    OPENAI_MAX_RETRIES: int = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
     
     # Vector Store Configuration
     CHROMA_PERSIST_DIRECTORY: str = "./chroma_db"
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    # "torch" or "onnx". ONNX (an int8 export shipped in the model repo, picked for
+    # this CPU) is opt-in until its recall against the existing torch-embedded
+    # collections has been checked with src/evaluation.
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "torch")
+    EMBEDDING_ONNX_FILE: str = os.getenv("EMBEDDING_ONNX_FILE") or _default_onnx_file()
+    # torch backend only; unset picks "cuda" when available (loaded in fp16), else "cpu"
+    EMBEDDING_DEVICE: Optional[str] = os.getenv("EMBEDDING_DEVICE")
+    # Intra-op threads per process for the embedder and cross-encoder; uvicorn
+    # workers (WEB_CONCURRENCY) split the cores instead of each claiming all.
+    INFERENCE_THREADS: int = int(os.getenv(
+        "INFERENCE_THREADS",
+        str(max(1, (os.cpu_count() or 1) // int(os.getenv("WEB_CONCURRENCY", "1")))),
+    ))
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "128"))
+    # all-MiniLM-L6-v2 already ends in a Normalize layer; this keeps unit vectors for any model
+    EMBEDDING_NORMALIZE: bool = os.getenv("EMBEDDING_NORMALIZE", "true").lower() == "true"
+    QUERY_EMBEDDING_CACHE_SIZE: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
     COLLECTION_NAME: str = "rag_tutor_collection"
     AGENTIC_COLLECTION_NAME: str = "agentic_tutor_collection"
     FIXED_SIZE_COLLECTION_NAME: str = "fixed_size_tutor_collection"
     RECURSIVE_COLLECTION_NAME: str = "recursive_tutor_collection"
 
-    CHROMA_CLOUD_HOST = os.getenv("CHROMA_CLOUD_HOST")
-    CHROMA_CLOUD_PORT = int(os.getenv("CHROMA_CLOUD_PORT", "8000"))
-    CHROMA_API_KEY = os.getenv("CHROMA_API_KEY")
-    CHROMA_TENANT = os.getenv("CHROMA_TENANT")
-    CHROMA_DB = os.getenv("CHROMA_DATABASE")
+    CHROMA_CLOUD_HOST: Optional[str] = os.getenv("CHROMA_CLOUD_HOST")
+    CHROMA_CLOUD_PORT: int = int(os.getenv("CHROMA_CLOUD_PORT", "8000"))
+    CHROMA_API_KEY: Optional[str] = os.getenv("CHROMA_API_KEY")
+    CHROMA_TENANT: Optional[str] = os.getenv("CHROMA_TENANT")
+    CHROMA_DB: Optional[str] = os.getenv("CHROMA_DATABASE")
+
+    # HNSW index parameters (applied when a collection is first created)
+    HNSW_SPACE: str = "cosine"
+    HNSW_M: int = int(os.getenv("HNSW_M", "32"))
+    HNSW_CONSTRUCTION_EF: int = int(os.getenv("HNSW_CONSTRUCTION_EF", "200"))
+    HNSW_SEARCH_EF: int = int(os.getenv("HNSW_SEARCH_EF", "64"))
+    # Opt-in: the index is built server-side, so the client's core count says nothing
+    HNSW_NUM_THREADS: Optional[int] = (
+        int(os.environ["HNSW_NUM_THREADS"]) if os.getenv("HNSW_NUM_THREADS") else None
+    )
+    # Max chunks per Chroma write; keeps request payloads bounded on big ingests
+    CHROMA_ADD_BATCH: int = int(os.getenv("CHROMA_ADD_BATCH", "256"))
     
     # Agent Configuration
     MAX_RETRIEVAL_DOCS: int = 5
     TEMPERATURE: float = 0.1
+    LLM_CACHE_SIZE: int = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+    # On-disk cache for ingestion LLM calls, so re-ingesting unchanged sources is free
+    INGEST_LLM_CACHE_PATH: str = os.getenv("INGEST_LLM_CACHE_PATH", ".ingest_llm_cache.db")
+    # "cross_encoder" scores locally; "llm" sends the docs to OPENAI_MODEL
+    RERANK_BACKEND: str = os.getenv("RERANK_BACKEND", "cross_encoder")
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_MAX_CHARS: int = 400
+    # Score cut-offs per scorer: ms-marco sigmoid scores sit far lower than LLM 0-1
+    # ratings for partly relevant passages. Below the cut-off everywhere, the best
+    # RERANK_FALLBACK_K docs are kept instead of none.
+    RERANK_THRESHOLD_CROSS_ENCODER: float = float(os.getenv("RERANK_THRESHOLD_CROSS_ENCODER", "0.05"))
+    RERANK_THRESHOLD_LLM: float = float(os.getenv("RERANK_THRESHOLD_LLM", "0.35"))
+    RERANK_FALLBACK_K: int = int(os.getenv("RERANK_FALLBACK_K", "4"))
 
     class Server:
         PORT = 8000
         SSE_PATH = "/sse"
         TRANSPORT = "sse"
 
-@dataclass
+@dataclass(slots=True)
 class ChunkConfig:
     """Configuration for text chunking"""
     chunk_size: int = 1000
@@ -46,5 +112,5 @@ class ChunkConfig:
     ])
     keep_separator: bool = True
 
-config = Config()
+config: Config = Config()
 
@@ -0,0 +1,120 @@
+"""Fetch, extract and enrich steps shared by every webpage chunking strategy."""
+
+import requests
+from bs4 import BeautifulSoup
+from langchain_core.documents import Document
+from langchain_core.prompts import ChatPromptTemplate
+
+from src.config.config import config
+from src.prompts.chunking import CODE_CHUNK_SYSTEM
+from src.utils.load_once import load_once
+from src.utils.openai_client import get_ingest_openai_client
+from src.utils.utils import extract_metadata_batch, nav_fields
+
+# ── Code-block description ────────────────────────────────────────────────────
+
+@load_once
+def _code_desc_chain():
+    return ChatPromptTemplate.from_messages([
+        ("system", CODE_CHUNK_SYSTEM),
+        ("human", "Code block:\n\n{code}"),
+    ]) | get_ingest_openai_client()
+
+
+def _describe_code_batch(codes: list[str]) -> list[str]:
+    """Describe every code block of a page in one concurrent batch; "" where a call fails."""
+    responses = _code_desc_chain().batch(
+        [{"code": code} for code in codes],
+        config={"max_concurrency": config.OPENAI_MAX_CONCURRENCY},
+        return_exceptions=True,
+    )
+    return ["" if isinstance(resp, Exception) else resp.content.strip() for resp in responses]
+
+
+# ── HTML helpers ──────────────────────────────────────────────────────────────
+
+def fetch_soup(url: str) -> BeautifulSoup:
+    html = requests.get(url, timeout=15).content
+    soup = BeautifulSoup(html, "lxml")
+    for tag in soup(["nav", "footer", "script", "style", "header", "aside"]):
+        tag.decompose()
+    return soup
+
+
+def get_page_title(soup: BeautifulSoup) -> str:
+    tag = soup.find("h1") or soup.find("title") or soup.find("h2")
+    return tag.get_text(strip=True) if tag else ""
+
+
+# ── Extract code blocks ───────────────────────────────────────────────────────
+
+def extract_code_blocks(soup: BeautifulSoup, url: str, slug: str, page_title: str) -> list[Document]:
+    """Pull every <pre> block out as an un-split Document and remove it from the soup."""
+    codes = []
+    for pre in soup.find_all("pre"):
+        if code := pre.get_text().strip():
+            codes.append(code)
+        pre.decompose()
+
+    return [
+        Document(
+            page_content=f"{desc}\n\n{code}" if desc else code,
+            metadata={
+                "source": "webpage", "url": url, "slug": slug,
+                "page_title": page_title, "content_type": "example",
+                "code_description": desc
+            },
+        )
+        for code, desc in zip(codes, _describe_code_batch(codes))
+    ]
+
+
+# ── Extract prose sections ────────────────────────────────────────────────────
+
+def extract_prose(soup: BeautifulSoup) -> list[Document]:
+    """Walk the cleaned HTML and return one Document per heading-section."""
+    main = soup.find("main") or soup.find("article") or soup.find("body") or soup
+    sections, heading, lines = [], "", []
+
+    for tag in main.find_all(["h1", "h2", "h3", "p", "li", "td", "th", "blockquote"]):
+        if tag.name in ("h1", "h2", "h3"):
+            if lines:
+                sections.append((heading, " ".join(lines)))
+                lines = []
+            heading = tag.get_text(strip=True)
+        elif text := tag.get_text(strip=True):
+            lines.append(text)
+
+    if lines:
+        sections.append((heading, " ".join(lines)))
+
+    return [
+        Document(page_content=text, metadata={"section_heading": h})
+        for h, text in sections if text
+    ]
+
+
+# ── Enrich metadata ───────────────────────────────────────────────────────────
+
+def enrich(docs: list[Document], url: str, slug: str, page_title: str) -> list[Document]:
+    total = len(docs)
+    page_meta = {
+        "source": "webpage", "url": url, "slug": slug,
+        "page_title": page_title, "is_code_block": False,
+    }
+    metas = iter(extract_metadata_batch(
+        [doc.page_content for doc in docs if not doc.metadata.get("is_code_block")]
+    ))
+    for i, doc in enumerate(docs):
+        nav = nav_fields(i, total)
+        if doc.metadata.get("is_code_block"):
+            doc.metadata.update(nav)
+            print(f"  [{i+1}/{total}] [CODE] {doc.metadata.get('code_description', '')[:70]}")
+        else:
+            m = next(metas)
+            doc.metadata.update(nav)
+            doc.metadata.update(page_meta)
+            doc.metadata["content_type"] = m.get("content_type", "concept")
+            print(f"  [{i+1}/{total}] [{doc.metadata.get('section_heading', '')}] "
+                  f"{m.get('content_type')}")
+    return docs
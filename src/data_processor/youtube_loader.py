@@ -0,0 +1,42 @@
+"""Load and enrich steps shared by every YouTube transcript chunking strategy."""
+
+import yt_dlp
+from langchain_core.documents import Document
+from youtube_transcript_api import YouTubeTranscriptApi
+
+from src.utils.utils import extract_metadata_batch, nav_fields
+
+# ── Load ──────────────────────────────────────────────────────────────────────
+
+def load_transcript(video_id: str) -> Document:
+    url = f"https://www.youtube.com/watch?v={video_id}"
+
+    with yt_dlp.YoutubeDL({"quiet": True, "skip_download": True}) as ydl:
+        info = ydl.extract_info(url, download=False)
+
+    transcript = YouTubeTranscriptApi().fetch(video_id).to_raw_data()
+    text = " ".join(t.get("text", "") for t in transcript if t.get("text"))
+
+    return Document(
+        page_content=text,
+        metadata={
+            "video_id":    video_id,
+            "video_title": info.get("title", "Untitled"),
+            "author":      info.get("uploader", "Unknown"),
+            "url":         url,
+        },
+    )
+
+
+# ── Enrich metadata ───────────────────────────────────────────────────────────
+
+def enrich(docs: list[Document], base_meta: dict) -> list[Document]:
+    total = len(docs)
+    chunk_meta = {**base_meta, "source": "youtube"}
+    metas = extract_metadata_batch([doc.page_content for doc in docs])
+    for i, (doc, m) in enumerate(zip(docs, metas)):
+        doc.metadata.update(chunk_meta)
+        doc.metadata.update(nav_fields(i, total))
+        doc.metadata["content_type"] = m.get("content_type", "explanation")
+        print(f"  [{i+1}/{total}] {m.get('content_type')}")
+    return docs
@@ -46,10 +46,10 @@ AGENTS = [
     {
         "name": "RetrievalNode",
         "role": "retrieval",
-        "description": "Multi-query vector search → RRF fusion → LLM reranking → fallback if too few results.",
+        "description": "Multi-query vector search → RRF fusion → cross-encoder reranking → fallback if too few results.",
         "inputs": ["original_question", "search_queries", "intent", "response_style"],
         "outputs": ["retrieved_docs"],
-        "rationale": "Multi-query + RRF = high recall; LLM reranking = high precision; fallback = robustness.",
+        "rationale": "Multi-query + RRF = high recall; cross-encoder reranking = high precision; fallback = robustness.",
     },
     {
         "name": "TutorAgent",
@@ -90,8 +90,9 @@ def agent_flow_mermaid():
     QU[Question understanding] --> RT[Router]
     RT -->|clarify| CL[Clarification]
     RT -->|tutor| PR[Personalization]
-    PR --> MQ[Multi-query expansion]
-    MQ --> RN[Retrieval + reranking]
+    RT -->|tutor| MQ[Multi-query expansion]
+    PR --> RN[Retrieval + reranking]
+    MQ --> RN
     RN --> TA[Tutor - Socratic]
     TA --> EV[Evaluation]
     CL --> EV
@@ -114,14 +115,17 @@ def sequence_mermaid():
     participant PR as Personalization
     participant MQ as MultiQueryAgent
     participant VS as ChromaDB
-    participant RR as Reranker (LLM)
+    participant RR as Reranker (cross-encoder)
     participant TA as TutorAgent
     participant EV as EvaluationAgent
 
     S->>QU: student question
     QU->>RT: intent, style, complexity
-    RT->>PR: route=tutor
-    PR->>MQ: competence_level
+    par route=tutor
+        RT->>PR: assess competence
+    and
+        RT->>MQ: expand queries
+    end
     MQ->>VS: 3-4 diverse queries
     VS-->>RR: fused chunks (RRF)
     RR-->>TA: top relevant chunks
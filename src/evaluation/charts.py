@@ -1,4 +1,5 @@
-import json, sys, statistics
+import sys, statistics
+import orjson
 import matplotlib.pyplot as plt
 import matplotlib
 import numpy as np
@@ -6,8 +7,8 @@ import numpy as np
 matplotlib.rcParams.update({"font.size": 11, "font.family": "sans-serif", "figure.dpi": 150})
  
 path = sys.argv[1] if len(sys.argv) > 1 else "evaluation_results.json"
-with open(path) as f:
-    results = json.load(f)
+with open(path, "rb") as f:
+    results = orjson.loads(f.read())
  
 DIMS = ["relevance", "completeness", "pedagogical_quality", "accuracy", "coherence"]
 DIM_LABELS = ["Relevance", "Completeness", "Pedagogical\nQuality", "Accuracy", "Coherence"]
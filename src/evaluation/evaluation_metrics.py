@@ -1,7 +1,8 @@
 import sys, os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
  
-import json, time, statistics
+import time, statistics
+import orjson
 from openai import OpenAI
 from langchain_core.documents import Document
  
@@ -55,7 +56,7 @@ def judge_response(question, contexts_text, answer):
             ],
         )
         raw = resp.choices[0].message.content.strip().replace("```json", "").replace("```", "")
-        return json.loads(raw.strip())
+        return orjson.loads(raw.strip())
     except Exception as e:
         print(f"    [Judge error] {e}")
         return {k: 0 for k in ["faithfulness", "answer_relevancy", "context_precision", "completeness", "pedagogical_quality"]}
@@ -81,13 +82,11 @@ def evaluate_one(question_info, chunking, retrieval):
     else:
         queries = [question]
  
-    all_docs = []
-    for q in queries:
-        if retrieval["search_type"] == "mmr":
-            docs = agent.retrieve_mmr(q, k=8)
-        else:
-            docs = agent.retrieve(q, k=8)
-        all_docs.extend(docs)
+    all_docs = [
+        doc
+        for docs in agent.retrieve_many(queries, k=8, mmr=retrieval["search_type"] == "mmr")
+        for doc in docs
+    ]
  
     # Deduplicate
     seen = set()
@@ -170,8 +169,8 @@ def run_evaluation():
                     print(f"    ✗ {e}")
  
             # Auto-save after each combo
-            with open("evaluation_results.json", "w") as f:
-                json.dump(all_results, f, indent=2)
+            with open("evaluation_results.json", "wb") as f:
+                f.write(orjson.dumps(all_results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
             print(f"  [{len(all_results)} results saved]")
  
     # ── Summary ───────────────────────────────────────────────────────
@@ -1,7 +1,8 @@
 import sys, os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-import json, time, statistics
+import time, statistics
+import orjson
 
 from openai import AsyncOpenAI
 from ragas.llms import llm_factory
@@ -132,13 +133,11 @@ def evaluate_one(question_info, chunking, retrieval):
     else:
         queries = [question]
 
-    all_docs = []
-    for q in queries:
-        if retrieval["search_type"] == "mmr":
-            docs = agent.retrieve_mmr(q, k=8)
-        else:
-            docs = agent.retrieve(q, k=8)
-        all_docs.extend(docs)
+    all_docs = [
+        doc
+        for docs in agent.retrieve_many(queries, k=8, mmr=retrieval["search_type"] == "mmr")
+        for doc in docs
+    ]
 
     # Deduplicate
     seen = set()
@@ -217,8 +216,8 @@ def run_evaluation():
                     print(f"    ✗ {e}")
 
             # Auto-save after each combo
-            with open("evaluation_results.json", "w") as f:
-                json.dump(all_results, f, indent=2)
+            with open("evaluation_results.json", "wb") as f:
+                f.write(orjson.dumps(all_results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
             print(f"  [{len(all_results)} results saved]")
 
     # ── Summary ───────────────────────────────────────────────────────
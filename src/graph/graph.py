@@ -10,10 +10,14 @@ from src.agents.evaluation import EvaluationAgent
 from src.agents.multi_queries import MultiQueryAgent
 
 
-def _route_after_router(state: TutorState, config=None) -> str:
+def _route_after_router(state: TutorState, config=None) -> str | list[str]:
     route = state.get("route", "tutor")
     print(f"[Graph] routing → {route}")
-    return route
+    if route == "clarify":
+        return "clarification"
+    # Personalization and query expansion don't depend on each other —
+    # fan out so both LLM calls run in the same step.
+    return ["personalization", "multi_queries"]
 
 
 class TutorGraphBuilder:
@@ -44,13 +48,9 @@ class TutorGraphBuilder:
         graph.add_conditional_edges(
             "router",
             _route_after_router,
-            {
-                "clarify": "clarification",
-                "tutor": "personalization",
-            },
+            ["clarification", "personalization", "multi_queries"],
         )
-        graph.add_edge("personalization", "multi_queries")
-        graph.add_edge("multi_queries", "retrieval")
+        graph.add_edge(["personalization", "multi_queries"], "retrieval")
         graph.add_edge("retrieval", "tutor")
 
 
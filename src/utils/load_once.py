@@ -0,0 +1,20 @@
+import threading
+from functools import lru_cache, wraps
+
+
+def load_once(fn):
+    """lru_cache with single-flight loading: concurrent first calls build the value once.
+
+    lru_cache alone lets racing threads (chunks_autorun workers, the startup
+    warm-up against the first request) each run the builder.
+    """
+    cached = lru_cache(maxsize=None)(fn)
+    lock = threading.Lock()
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with lock:
+            return cached(*args, **kwargs)
+
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
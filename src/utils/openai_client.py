@@ -1,5 +1,96 @@
+import httpx
+from langchain_community.cache import SQLAlchemyCache
+from langchain_core.caches import InMemoryCache
 from langchain_openai import ChatOpenAI as OpenAI
+from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
+from sqlalchemy import create_engine, event
 from src.config.config import config
+from src.utils.load_once import load_once
+
+# Shared connection pools — every agent reuses the same keep-alive connections.
+# The OpenAI SDK's httpx subclasses keep its default timeouts and redirects.
+# max_connections caps in-flight requests *per pool*: sync calls (agents run in
+# LangGraph's thread executor, ingestion batches) and async calls (streaming)
+# each get OPENAI_MAX_CONCURRENCY, so the process-wide ceiling is twice that.
+# Extra callers wait for a free connection instead of tripping 429s.
+_limits = httpx.Limits(
+    max_connections=config.OPENAI_MAX_CONCURRENCY,
+    max_keepalive_connections=config.OPENAI_MAX_CONCURRENCY,
+)
+http_client = DefaultHttpxClient(limits=_limits)
+http_async_client = DefaultAsyncHttpxClient(limits=_limits)
 
 # OpenAI Client
-openai_client: OpenAI = OpenAI(api_key=config.OPENAI_API_KEY, model=config.OPENAI_MODEL)
\ No newline at end of file
+openai_client: OpenAI = OpenAI(
+    api_key=config.OPENAI_API_KEY,
+    model=config.OPENAI_MODEL,
+    max_retries=config.OPENAI_MAX_RETRIES,
+    http_client=http_client,
+    http_async_client=http_async_client,
+)
+
+# Same client with a response cache keyed on (prompt, model params). Used by the
+# analysis / query-expansion / rerank calls, whose inputs repeat across turns.
+llm_cache = InMemoryCache(maxsize=config.LLM_CACHE_SIZE)
+cached_openai_client: OpenAI = OpenAI(
+    api_key=config.OPENAI_API_KEY,
+    model=config.OPENAI_MODEL,
+    max_retries=config.OPENAI_MAX_RETRIES,
+    http_client=http_client,
+    http_async_client=http_async_client,
+    cache=llm_cache,
+)
+
+class _IngestLLMCache(SQLAlchemyCache):
+    """On-disk LLM cache shared by ingest threads and processes.
+
+    WAL plus a busy timeout let concurrent writers queue instead of failing with
+    "database is locked"; any remaining cache error is logged and skipped, so it
+    never replaces a good LLM answer with the callers' fallback.
+    """
+
+    def __init__(self, database_path: str):
+        engine = create_engine(f"sqlite:///{database_path}", connect_args={"timeout": 30})
+        event.listen(engine, "connect", _enable_wal)
+        super().__init__(engine)
+
+    def lookup(self, prompt: str, llm_string: str):
+        try:
+            return super().lookup(prompt, llm_string)
+        except Exception as e:
+            print(f"[ingest cache] lookup failed: {e}")
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        try:
+            super().update(prompt, llm_string, return_val)
+        except Exception as e:
+            print(f"[ingest cache] update failed: {e}")
+
+
+def _enable_wal(dbapi_connection, _record) -> None:
+    dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+
+@load_once
+def get_ingest_openai_client() -> OpenAI:
+    """Ingestion client (chunking, chunk metadata, code descriptions).
+
+    Its cache lives on disk so unchanged sources skip every LLM call when they
+    are ingested again, across restarts and chunks_autorun runs. Built on first
+    use, so processes that never ingest (API workers, tests) don't open the file.
+    """
+    return OpenAI(
+        api_key=config.OPENAI_API_KEY,
+        model=config.OPENAI_MODEL,
+        max_retries=config.OPENAI_MAX_RETRIES,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        cache=_IngestLLMCache(config.INGEST_LLM_CACHE_PATH),
+    )
+
+
+async def close_http_clients() -> None:
+    """Close the shared connection pools (call on app shutdown)."""
+    http_client.close()
+    await http_async_client.aclose()
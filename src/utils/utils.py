@@ -1,14 +1,18 @@
 from typing import Any, Dict
-import json
+import orjson
+import re
 from typing import Any, Dict, Optional
-from src.prompts.chunking import METADATA_CHUNK_SYSTEM
-from src.vector_store.vector_store import VectorStoreManager
+from src.config.config import config
+from src.prompts.chunking import AGENTIC_CHUNK_SYSTEM, METADATA_CHUNK_SYSTEM
+from src.vector_store.vector_store import get_vector_store_manager
 
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_experimental.text_splitter import SemanticChunker
 from langchain_openai import OpenAIEmbeddings
 from langchain_core.documents import Document
-from src.utils.openai_client import openai_client
+from langchain_core.messages import SystemMessage, HumanMessage
+from src.utils.load_once import load_once
+from src.utils.openai_client import get_ingest_openai_client
 
 import dotenv
 import os
@@ -16,9 +20,17 @@ import os
 dotenv.load_dotenv()
 
 
+_CODE_FENCE_RE = re.compile(r"```(?:json)?")
+
+
+def strip_code_fences(text: str) -> str:
+    """Remove ```json / ``` fences an LLM wraps around its JSON output."""
+    return _CODE_FENCE_RE.sub("", text.strip()).strip()
+
+
 def safe_json_loads(text: str) -> Optional[Dict[str, Any]]:
     try:
-        return json.loads(text)
+        return orjson.loads(text)
     except Exception:
         return None
 
@@ -29,24 +41,32 @@ embeddings = OpenAIEmbeddings(
     api_key=os.getenv("OPENAI_API_KEY"),
 )
 
-llm = openai_client
-
-_metadata_chain = ChatPromptTemplate.from_messages([
-    ("system", METADATA_CHUNK_SYSTEM),
-    ("human", "{text}"),
-]) | llm
+@load_once
+def _metadata_chain():
+    return ChatPromptTemplate.from_messages([
+        ("system", METADATA_CHUNK_SYSTEM),
+        ("human", "{text}"),
+    ]) | get_ingest_openai_client()
 
 _METADATA_FALLBACK: dict[str, Any] = {
     "content_type": "concept"
 }
 
 
-def extract_metadata(text: str) -> dict[str, Any]:
-    """Return LLM-generated metadata for a text chunk."""
-    try:
-        return json.loads(_metadata_chain.invoke({"text": text}).content)
-    except Exception:
-        return _METADATA_FALLBACK.copy()
+def extract_metadata_batch(texts: list[str]) -> list[dict[str, Any]]:
+    """Return LLM-generated metadata for many chunks, running the calls concurrently."""
+    responses = _metadata_chain().batch(
+        [{"text": text} for text in texts],
+        config={"max_concurrency": config.OPENAI_MAX_CONCURRENCY},
+        return_exceptions=True,
+    )
+    results = []
+    for resp in responses:
+        try:
+            results.append(orjson.loads(resp.content))
+        except Exception:
+            results.append(_METADATA_FALLBACK.copy())
+    return results
 
 def nav_fields(index: int, total: int) -> dict[str, Any]:
     """Return chunk navigation fields for a given index / total."""
@@ -66,18 +86,40 @@ def make_semantic_chunker(threshold: float = 1.0) -> SemanticChunker:
         breakpoint_threshold_amount=threshold,
     )
 
+def agentic_chunk(text: str, max_chars: int = 12000) -> list[str]:
+    """Send text to LLM in windows, let it split into semantic chunks."""
+    all_chunks = []
+    # Process in windows to stay within context limits
+    for start in range(0, len(text), max_chars):
+        window = text[start:start + max_chars]
+        resp = get_ingest_openai_client().invoke([
+            SystemMessage(content=AGENTIC_CHUNK_SYSTEM),
+            HumanMessage(content=window),
+        ])
+        raw = strip_code_fences(resp.content)
+        chunks = safe_json_loads(raw)
+        if isinstance(chunks, list):
+            all_chunks.extend([c for c in chunks if isinstance(c, str) and c.strip()])
+        else:
+            all_chunks.append(window)
+    return all_chunks
+
 def set_active_store_type(type: str) -> None:
     """Set which collection store() writes to. Call before running processors."""
     global _active_store_type
     _active_store_type = type
     print(f"[utils] Active store type set to: {type}")
 
-def store(docs: list[Document], type: str = None) -> None:
-    """Persist documents to the vector store using the active store type."""
+def store(docs: list[Document], type: str = None, replace_sources: bool = False) -> None:
+    """Persist documents to the vector store using the active store type.
+
+    Pass replace_sources=True only with complete sources: every chunk of a URL
+    the docs cover. Its other stored chunks are then deleted.
+    """
     store_type = type or _active_store_type
     if docs:
         print(f"[utils] Storing {len(docs)} docs to '{_active_store_type}' collection")
-        VectorStoreManager(type=store_type).add_documents(docs)
+        get_vector_store_manager(store_type).add_documents(docs, replace_sources=replace_sources)
 
 from urllib.parse import urlparse, parse_qs
 
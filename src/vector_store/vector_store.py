@@ -1,12 +1,20 @@
-import json
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
+import numpy as np
+import orjson
 from chromadb.config import Settings
 from langchain_chroma import Chroma
 from langchain_community.docstore.document import Document
-from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
+from sentence_transformers import SentenceTransformer
 import chromadb
 from src.config.config import config
+from src.utils.load_once import load_once
 
 _COLLECTION_MAP = {
     "semantic":   config.COLLECTION_NAME,
@@ -15,37 +23,290 @@ _COLLECTION_MAP = {
     "recursive":  config.RECURSIVE_COLLECTION_NAME,
 }
 
+
+@load_once
+def get_embeddings() -> SentenceTransformer:
+    """Load the local embedding model once per process, on ONNX Runtime or a (GPU) torch device."""
+    if config.EMBEDDING_BACKEND == "onnx":
+        import onnxruntime as ort
+
+        session_options = ort.SessionOptions()
+        session_options.intra_op_num_threads = config.INFERENCE_THREADS
+        return SentenceTransformer(
+            config.EMBEDDING_MODEL,
+            backend="onnx",
+            model_kwargs={"file_name": config.EMBEDDING_ONNX_FILE, "session_options": session_options},
+        )
+    import torch
+
+    torch.set_num_threads(config.INFERENCE_THREADS)
+    device = _torch_device()
+    model_kwargs = {}
+    if device.startswith("cuda"):
+        # Half precision halves weight memory and runs the BERT matmuls on tensor cores.
+        model_kwargs["torch_dtype"] = torch.float16
+    return SentenceTransformer(config.EMBEDDING_MODEL, device=device, model_kwargs=model_kwargs)
+
+
+def _torch_device() -> str:
+    import torch
+
+    return config.EMBEDDING_DEVICE or ("cuda" if torch.cuda.is_available() else "cpu")
+
+
+@lru_cache(maxsize=1)
+def embedding_fingerprint() -> str:
+    """Identifies the embedding space (model, backend, precision) chunks are written with."""
+    if config.EMBEDDING_BACKEND == "onnx":
+        return f"{config.EMBEDDING_MODEL}|onnx|{config.EMBEDDING_ONNX_FILE}"
+    precision = "fp16" if _torch_device().startswith("cuda") else "fp32"
+    return f"{config.EMBEDDING_MODEL}|torch|{precision}"
+
+
+class _QueryCachedEmbeddings(Embeddings):
+    """Shared embedding model plus an LRU of query embeddings.
+
+    Chat traffic repeats itself (the same expanded queries come back across turns
+    and users), so an exact repeat skips the forward pass. Whitespace is
+    normalized in the key since the tokenizer ignores it anyway.
+    """
+
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def _model(self) -> SentenceTransformer:
+        # Loaded on first embed, so managers used only for collection access
+        # never pay for the model; get_embeddings() shares it process-wide.
+        return get_embeddings()
+
+    def embed_documents_array(self, texts: list[str]) -> np.ndarray:
+        """Encode straight to one float32 array; Chroma takes it without a .tolist() copy."""
+        # A whole source's chunks are embedded in one call; larger batches keep the
+        # matmuls wide instead of sentence-transformers' default of 32.
+        return self._model.encode(
+            texts,
+            batch_size=config.EMBEDDING_BATCH_SIZE,
+            normalize_embeddings=config.EMBEDDING_NORMALIZE,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+        )
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_documents_array(texts).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_queries([text])[0].tolist()
+
+    def embed_queries(self, texts: list[str]) -> np.ndarray:
+        """Embed many queries, running one forward pass over the cache misses only."""
+        keys = [" ".join(text.split()) for text in texts]
+        with self._lock:
+            cached = {key: self._cache[key] for key in keys if key in self._cache}
+            for key in cached:
+                self._cache.move_to_end(key)
+        misses = list(dict.fromkeys(key for key in keys if key not in cached))
+        if misses:
+            fresh = dict(zip(misses, self.embed_documents_array(misses)))
+            with self._lock:
+                for key, vector in fresh.items():
+                    self._cache[key] = vector
+                while len(self._cache) > self._maxsize:
+                    self._cache.popitem(last=False)
+            cached.update(fresh)
+        return np.stack([cached[key] for key in keys])
+
+
+@load_once
+def _get_store_embeddings() -> _QueryCachedEmbeddings:
+    return _QueryCachedEmbeddings(maxsize=config.QUERY_EMBEDDING_CACHE_SIZE)
+
+
+@load_once
+def _get_client() -> chromadb.ClientAPI:
+    return chromadb.CloudClient(
+        api_key=config.CHROMA_API_KEY,
+        tenant=config.CHROMA_TENANT,
+        database=config.CHROMA_DB
+    )
+
+
+@load_once
+def get_vector_store_manager(type: str = "agentic") -> "VectorStoreManager":
+    """Shared VectorStoreManager per collection type, for ingestion and retrieval alike."""
+    return VectorStoreManager(type=type)
+
+
 class VectorStoreManager:
     """Manages ChromaDB vector store operations."""
 
     def __init__(self, type="agentic"):
-        if hasattr(self, "vector_store"):
-            return
-        self.client = chromadb.CloudClient(
-            api_key=config.CHROMA_API_KEY,
-            tenant=config.CHROMA_TENANT,
-            database=config.CHROMA_DB
-        )
+        self.client = _get_client()
+        self.embeddings = _get_store_embeddings()
+
+        collection_metadata = {
+            "hnsw:space": config.HNSW_SPACE,
+            "hnsw:M": config.HNSW_M,
+            "hnsw:construction_ef": config.HNSW_CONSTRUCTION_EF,
+            "hnsw:search_ef": config.HNSW_SEARCH_EF,
+        }
+        if config.HNSW_NUM_THREADS is not None:
+            collection_metadata["hnsw:num_threads"] = config.HNSW_NUM_THREADS
 
         self.vector_store = Chroma(
             collection_name=_COLLECTION_MAP.get(type, config.COLLECTION_NAME),
-            embedding_function=HuggingFaceEmbeddings(model_name=config.EMBEDDING_MODEL),
+            embedding_function=self.embeddings,
             # embedding_function=OpenAIEmbeddings("text-embedding-3-small"),
-            client=self.client
+            client=self.client,
+            collection_metadata=collection_metadata,
         )
 
-    def add_documents(self, documents: list[Document]) -> None:
-        """Normalize and add documents to the vector store."""
+    def add_documents(self, documents: list[Document], replace_sources: bool = False) -> None:
+        """Normalize and add documents to the vector store.
+
+        With replace_sources, documents carry every chunk of their source URLs:
+        stored chunks of those URLs that are not among them are deleted.
+        """
         if not documents:
             return
         print(f"Adding {len(documents)} documents to vector store...")
-        self.vector_store.add_documents(documents=list(map(_normalize, documents)))
+        # Deterministic ids make re-ingesting a source upsert its chunks instead of
+        # duplicating them; each source URL is hashed once per call.
+        source_digests: dict[str, bytes] = {}
+        fingerprint = embedding_fingerprint()
+        by_id = {
+            _chunk_id(doc, source_digests): doc
+            for doc in (_normalize(doc, fingerprint) for doc in documents)
+        }
+        ids = list(by_id)
+        batch = config.CHROMA_ADD_BATCH
+        collection = self.vector_store._collection
+        # Boilerplate (repeated snippets, footers) shows up under several ids;
+        # each distinct text is embedded once per call, and its vector is dropped
+        # after its last occurrence so only one batch of vectors stays resident.
+        remaining = Counter(doc.page_content for doc in by_id.values())
+        vectors: dict[str, np.ndarray] = {}
+        skipped = 0
+        # Embed batch i+1 while batch i is being written; at most one write in flight.
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            pending = None
+            for start in range(0, len(ids), batch):
+                batch_ids = ids[start:start + batch]
+                # Re-ingesting a source reuses its ids; chunks already stored with the
+                # same text and metadata are left alone and never re-embedded. The
+                # metadata carries the embedding fingerprint, so a model or backend
+                # change re-embeds everything instead of mixing vector spaces.
+                stored = collection.get(ids=batch_ids, include=["documents", "metadatas"])
+                unchanged = {
+                    doc_id
+                    for doc_id, text, meta in zip(stored["ids"], stored["documents"], stored["metadatas"])
+                    if by_id[doc_id].page_content == text and by_id[doc_id].metadata == meta
+                }
+                skipped += len(unchanged)
+                changed = [doc_id for doc_id in batch_ids if doc_id not in unchanged]
+                if changed:
+                    chunk = [by_id[doc_id] for doc_id in changed]
+                    texts = [doc.page_content for doc in chunk]
+                    new_texts = [text for text in dict.fromkeys(texts) if text not in vectors]
+                    if new_texts:
+                        vectors.update(zip(new_texts, self.embeddings.embed_documents_array(new_texts)))
+                    embeddings = np.stack([vectors[text] for text in texts])
+                    if pending is not None:
+                        pending.result()
+                    pending = writer.submit(
+                        collection.upsert,
+                        ids=changed,
+                        embeddings=embeddings,
+                        documents=texts,
+                        metadatas=[doc.metadata for doc in chunk],
+                    )
+                for doc_id in batch_ids:
+                    text = by_id[doc_id].page_content
+                    remaining[text] -= 1
+                    if not remaining[text]:
+                        vectors.pop(text, None)
+            if pending is not None:
+                pending.result()
+        if skipped:
+            print(f"Skipped {skipped} unchanged chunks already in the vector store.")
+        if replace_sources:
+            self._delete_replaced_chunks(by_id)
+
+    def _delete_replaced_chunks(self, by_id: dict[str, Document]) -> None:
+        """Delete stored chunks of the ingested URLs whose ids this ingest did not write.
+
+        Covers a re-ingest that yields fewer chunks and chunks stored under
+        pre-deterministic (random) ids, which would otherwise keep being served.
+        """
+        collection = self.vector_store._collection
+        urls = {url for doc in by_id.values() if (url := doc.metadata.get("url"))}
+        for url in urls:
+            stored = collection.get(where={"url": url}, include=[])["ids"]
+            stale = [doc_id for doc_id in stored if doc_id not in by_id]
+            if stale:
+                collection.delete(ids=stale)
+                print(f"Deleted {len(stale)} chunks of {url} no longer produced by this ingest.")
+
+    def batch_search(self, queries: list[str], k: int = 5, metadata_filter: dict | None = None) -> list[list[Document]]:
+        """Embed all uncached queries in one forward pass and search them in a single Chroma request."""
+        if not queries:
+            return []
+        query_embeddings = self.embeddings.embed_queries(list(queries))
+        results = self.vector_store._collection.query(
+            query_embeddings=query_embeddings,
+            n_results=k,
+            where=metadata_filter or None,
+            include=["documents", "metadatas"],
+        )
+        return [
+            [
+                Document(page_content=text or "", metadata=meta or {}, id=doc_id)
+                for doc_id, text, meta in zip(ids, texts, metas)
+            ]
+            for ids, texts, metas in zip(results["ids"], results["documents"], results["metadatas"])
+        ]
+
+
+def _chunk_id(doc: Document, source_digests: dict[str, bytes]) -> str:
+    """64-bit BLAKE2b id from the chunk's source URL and chunk_index (its text if unindexed).
+
+    Chunks without a URL are keyed on their text alone, so chunks of different
+    URL-less sources never share an id.
+
+    Collections ingested before ids were deterministic hold chunks under random
+    uuid4 ids that no re-ingest would match. The chunking runners store with
+    replace_sources=True, which deletes a URL's other chunks, so the first
+    re-ingest of each source (chunks_autorun.py, /ingest_url) migrates it. Sources
+    that are never re-ingested keep their single legacy copy.
+    """
+    source = str(doc.metadata.get("url") or "")
+    if not source:
+        return hashlib.blake2b(doc.page_content.encode(), digest_size=8).hexdigest()
+    digest = source_digests.get(source)
+    if digest is None:
+        digest = source_digests[source] = hashlib.blake2b(source.encode(), digest_size=16).digest()
+    h = hashlib.blake2b(digest, digest_size=8)
+    index = doc.metadata.get("chunk_index")
+    if index is not None:
+        h.update(b"#%d" % index)
+    else:
+        h.update(b":")
+        h.update(doc.page_content.encode())
+    return h.hexdigest()
+
 
+def _normalize(doc: Document, fingerprint: str) -> Document:
+    """Chroma-ready copy: list/dict values as JSON strings, None values dropped, embedding fingerprint added.
 
-def _normalize(doc: Document) -> Document:
-    """Serialize any list/dict metadata values to JSON strings for Chroma."""
+    Chroma does not store None, so dropping it here keeps the metadata equal to
+    what a later get() returns.
+    """
     md = {
-        k: json.dumps(v, ensure_ascii=False) if isinstance(v, (list, dict)) else v
+        k: orjson.dumps(v).decode() if isinstance(v, (list, dict)) else v
         for k, v in (doc.metadata or {}).items()
+        if v is not None
     }
-    return Document(page_content=doc.page_content, metadata=md)
\ No newline at end of file
+    md["embedding_model"] = fingerprint
+    return Document(page_content=doc.page_content, metadata=md)
@@ -0,0 +1,5 @@
+import os
+
+# src.utils.openai_client builds ChatOpenAI clients at import time; they only
+# need a key to exist, and no test talks to OpenAI.
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
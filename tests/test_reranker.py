@@ -0,0 +1,111 @@
+import dataclasses
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("langchain_chroma")
+
+from src.agents import retrieval
+from src.agents.retrieval import CrossEncoderReranker, RetrievalAgent
+
+
+def _model_cached(repo_id: str) -> bool:
+    try:
+        from huggingface_hub import try_to_load_from_cache
+    except ImportError:
+        return False
+    return isinstance(try_to_load_from_cache(repo_id, "config.json"), str)
+
+
+class _FakeLLM:
+    def __init__(self, content=None, error=None):
+        self.content, self.error = content, error
+
+    def invoke(self, messages):
+        if self.error:
+            raise self.error
+        return SimpleNamespace(content=self.content)
+
+
+def _agent(client=None) -> RetrievalAgent:
+    return RetrievalAgent(store_manager=SimpleNamespace(vector_store=None), client=client or _FakeLLM())
+
+
+def _docs(n: int) -> list[dict]:
+    return [{"id": str(i), "content": f"doc {i}", "metadata": {}} for i in range(n)]
+
+
+@pytest.fixture
+def use_config(monkeypatch):
+    def apply(**overrides):
+        monkeypatch.setattr(retrieval, "config", dataclasses.replace(retrieval.config, **overrides))
+    apply(RERANK_BACKEND="cross_encoder", RERANK_THRESHOLD_CROSS_ENCODER=0.05,
+          RERANK_THRESHOLD_LLM=0.35, RERANK_FALLBACK_K=2)
+    return apply
+
+
+@pytest.fixture
+def cross_encoder_scores(monkeypatch):
+    def apply(scores):
+        monkeypatch.setattr(retrieval._cross_encoder, "score", lambda question, texts: list(scores))
+    return apply
+
+
+def _ids(docs):
+    return [d["id"] for d in docs]
+
+
+def test_rerank_drops_docs_below_the_cross_encoder_threshold(use_config, cross_encoder_scores):
+    cross_encoder_scores([0.9, 0.01, 0.5])
+    kept = _agent().rerank("q", _docs(3))
+    assert _ids(kept) == ["0", "2"]
+    assert kept[0]["relevance_score"] == 0.9
+
+
+def test_rerank_keeps_only_top_n_by_score(use_config, cross_encoder_scores):
+    cross_encoder_scores([0.2, 0.9, 0.5, 0.7])
+    assert _ids(_agent().rerank("q", _docs(4), top_n=2)) == ["1", "3"]
+
+
+def test_rerank_ties_keep_document_order(use_config, cross_encoder_scores):
+    cross_encoder_scores([0.5, 0.5, 0.5])
+    assert _ids(_agent().rerank("q", _docs(3))) == ["0", "1", "2"]
+    assert _ids(_agent().rerank("q", _docs(3), top_n=2)) == ["0", "1"]
+
+
+def test_rerank_falls_back_to_best_k_when_nothing_clears(use_config, cross_encoder_scores):
+    cross_encoder_scores([0.01, 0.03, 0.02])
+    assert _ids(_agent().rerank("q", _docs(3))) == ["1", "2"]
+
+
+def test_rerank_uses_llm_scores_and_threshold_when_cross_encoder_fails(use_config, monkeypatch):
+    def broken(question, texts):
+        raise RuntimeError("no model")
+    monkeypatch.setattr(retrieval._cross_encoder, "score", broken)
+    kept = _agent(_FakeLLM(content="[0.9, 0.2, 0.4]")).rerank("q", _docs(3))
+    assert _ids(kept) == ["0", "2"]
+
+
+def test_rerank_returns_docs_unfiltered_when_both_scorers_fail(use_config, monkeypatch):
+    use_config(RERANK_BACKEND="llm")
+    docs = _docs(3)
+    assert _agent(_FakeLLM(error=RuntimeError("down"))).rerank("q", docs) == docs
+
+
+@pytest.mark.network
+@pytest.mark.skipif(not _model_cached(retrieval.config.RERANK_MODEL),
+                    reason="cross-encoder not in the local Hugging Face cache")
+def test_cross_encoder_scores_are_probabilities():
+    reranker = CrossEncoderReranker()
+    scores = reranker.score(
+        "What is a Python list comprehension?",
+        [
+            "A list comprehension builds a list from an iterable in a single expression.",
+            "The Eiffel Tower is in Paris.",
+            "",
+        ],
+    )
+    assert len(scores) == 3
+    assert all(0.0 <= s <= 1.0 for s in scores)
+    assert scores[0] > scores[1]
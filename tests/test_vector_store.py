@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain_chroma")
+pytest.importorskip("sentence_transformers")
+
+from langchain_core.documents import Document
+
+from src.utils.utils import nav_fields
+from src.vector_store.vector_store import VectorStoreManager
+
+
+class _FakeCollection:
+    """In-memory stand-in for the Chroma collection calls add_documents makes."""
+
+    def __init__(self):
+        self.rows: dict[str, dict] = {}
+        self.upserts = 0
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas")):
+        if ids is not None:
+            hits = [i for i in ids if i in self.rows]
+        else:
+            hits = [i for i, row in self.rows.items()
+                    if all(row["metadata"].get(k) == v for k, v in where.items())]
+        return {
+            "ids": hits,
+            "documents": [self.rows[i]["document"] for i in hits],
+            "metadatas": [self.rows[i]["metadata"] for i in hits],
+        }
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.upserts += 1
+        for doc_id, document, metadata in zip(ids, documents, metadatas):
+            self.rows[doc_id] = {"document": document, "metadata": dict(metadata)}
+
+    def delete(self, ids):
+        for doc_id in ids:
+            del self.rows[doc_id]
+
+
+class _FakeEmbeddings:
+    def __init__(self):
+        self.embedded: list[str] = []
+
+    def embed_documents_array(self, texts):
+        self.embedded.extend(texts)
+        return np.ones((len(texts), 3), dtype=np.float32)
+
+
+@pytest.fixture
+def manager():
+    m = VectorStoreManager.__new__(VectorStoreManager)
+    m.vector_store = SimpleNamespace(_collection=_FakeCollection())
+    m.embeddings = _FakeEmbeddings()
+    return m
+
+
+def _source(url: str, texts: list[str], **extra) -> list[Document]:
+    return [
+        Document(page_content=text, metadata={"url": url, **nav_fields(i, len(texts)), **extra})
+        for i, text in enumerate(texts)
+    ]
+
+
+def test_unchanged_chunks_are_not_re_embedded(manager):
+    manager.add_documents(_source("https://a", ["one", "two"]))
+    manager.embeddings.embedded.clear()
+
+    # nav_fields' None prev/next values must not make the chunks look changed.
+    manager.add_documents(_source("https://a", ["one", "two"]))
+
+    assert manager.embeddings.embedded == []
+    assert manager.vector_store._collection.upserts == 1
+
+
+def test_metadata_only_change_rewrites_that_chunk(manager):
+    manager.add_documents(_source("https://a", ["one", "two"], content_type="concept"))
+    manager.embeddings.embedded.clear()
+
+    docs = _source("https://a", ["one", "two"], content_type="concept")
+    docs[1].metadata["content_type"] = "example"
+    manager.add_documents(docs)
+
+    assert manager.embeddings.embedded == ["two"]
+    stored = manager.vector_store._collection.get(where={"url": "https://a"})
+    assert sorted(m["content_type"] for m in stored["metadatas"]) == ["concept", "example"]
+
+
+def test_shrunk_source_drops_old_tail_only_when_replacing(manager):
+    collection = manager.vector_store._collection
+    manager.add_documents(_source("https://a", ["one", "two", "three"]), replace_sources=True)
+    manager.add_documents(_source("https://b", ["other"]), replace_sources=True)
+
+    # A partial store (e.g. a retry of some chunks) must not delete anything.
+    manager.add_documents(_source("https://a", ["one"]))
+    assert len(collection.get(where={"url": "https://a"})["ids"]) == 3
+
+    manager.add_documents(_source("https://a", ["one", "two"]), replace_sources=True)
+    assert collection.get(where={"url": "https://a"})["documents"] == ["one", "two"]
+    assert collection.get(where={"url": "https://b"})["documents"] == ["other"]
+
+
+def test_replacing_a_source_removes_chunks_under_legacy_ids(manager):
+    collection = manager.vector_store._collection
+    collection.rows["0b5c-random-uuid"] = {"document": "one", "metadata": {"url": "https://a"}}
+
+    manager.add_documents(_source("https://a", ["one"]), replace_sources=True)
+
+    assert "0b5c-random-uuid" not in collection.rows
+    assert collection.get(where={"url": "https://a"})["documents"] == ["one"]
+
+
+def test_url_less_chunks_do_not_collide(manager):
+    docs = [
+        Document(page_content="first source", metadata={"chunk_index": 0}),
+        Document(page_content="second source", metadata={"chunk_index": 0}),
+    ]
+    manager.add_documents(docs)
+
+    assert sorted(r["document"] for r in manager.vector_store._collection.rows.values()) == [
+        "first source", "second source",
+    ]